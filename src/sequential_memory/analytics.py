@@ -0,0 +1,166 @@
+"""Vectorized analytics over thought graphs using columnar NumPy arrays."""
+
+from dataclasses import dataclass
+from typing import List
+
+from .graph import ThoughtGraph
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - exercised only without numpy
+    np = None
+
+
+def _require_numpy():
+    """Raise a helpful error when NumPy is not installed."""
+    if np is None:
+        raise ImportError(
+            "Graph analytics require numpy; install sequential-memory[analytics]"
+        )
+
+
+@dataclass
+class GraphArrays:
+    """Columnar view of a thought graph, one row per node.
+
+    Rows follow the graph's insertion order, so parents come before their
+    children. `parent` holds row indexes, with -1 for roots.
+    """
+    ids: List[str]
+    parent: "np.ndarray"
+    depth: "np.ndarray"
+    confidence: "np.ndarray"
+    selected: "np.ndarray"
+    branch_point: "np.ndarray"
+    on_path: "np.ndarray"
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+
+def _compute_depths(parent: "np.ndarray") -> "np.ndarray":
+    """Compute each row's depth by pointer doubling in O(log depth) passes."""
+    has_parent = parent >= 0
+    jump = np.where(has_parent, parent, np.arange(len(parent)))
+    depth = has_parent.astype(np.int64)
+
+    while True:
+        next_jump = jump[jump]
+        if np.array_equal(next_jump, jump):
+            return depth
+        depth = depth + depth[jump]
+        jump = next_jump
+
+
+def graph_to_arrays(graph: ThoughtGraph) -> GraphArrays:
+    """
+    Export a graph into columnar NumPy arrays.
+
+    The graph keeps its node fields in columns as it grows, so this copies
+    them in bulk rather than walking the nodes.
+
+    Args:
+        graph: The graph to export
+
+    Returns:
+        Arrays of parent index, depth, confidence and node flags
+    """
+    _require_numpy()
+
+    columns = graph.get_columns()
+    ids = columns["ids"]
+
+    # Copy, so the graph's columns can keep growing after this returns
+    parent = np.frombuffer(columns["parent"], dtype=np.int64).copy()
+    confidence = np.frombuffer(columns["confidence"], dtype=np.float64).copy()
+    selected = np.frombuffer(columns["selected"], dtype=np.int8).astype(bool)
+    branch_point = np.frombuffer(columns["branch_point"], dtype=np.int8).astype(bool)
+
+    on_path = np.zeros(len(ids), dtype=bool)
+    on_path[columns["path_rows"]] = True
+
+    return GraphArrays(
+        ids=ids,
+        parent=parent,
+        depth=_compute_depths(parent),
+        confidence=confidence,
+        selected=selected,
+        branch_point=branch_point,
+        on_path=on_path
+    )
+
+
+def analyze_arrays(arrays: GraphArrays, bins: int = 10) -> dict:
+    """
+    Compute aggregate metrics from a columnar graph.
+
+    Args:
+        arrays: The graph's columnar view
+        bins: Number of equal-width confidence histogram bins over [0, 1]
+
+    Returns:
+        Confidence, depth, branching, backtrack and alternative metrics
+    """
+    _require_numpy()
+
+    count = len(arrays)
+    parent = arrays.parent
+    has_parent = parent >= 0
+    child_parents = parent[has_parent]
+
+    children = np.bincount(child_parents, minlength=count)
+    selected_children = np.bincount(child_parents, minlength=count,
+                                    weights=arrays.selected[has_parent])
+
+    # Every selected child beyond the first means the session came back here
+    backtracks = int(np.maximum(selected_children - 1, 0).sum())
+
+    # Alternatives are the children of branch points
+    is_alternative = np.zeros(count, dtype=bool)
+    is_alternative[has_parent] = arrays.branch_point[child_parents]
+    explored = int(np.count_nonzero(is_alternative & arrays.selected))
+    unexplored = int(np.count_nonzero(is_alternative & ~arrays.selected))
+
+    counts, edges = np.histogram(arrays.confidence, bins=bins, range=(0.0, 1.0))
+    internal = children[children > 0]
+
+    return {
+        "node_count": count,
+        "root_count": int(count - np.count_nonzero(has_parent)),
+        "leaf_count": int(np.count_nonzero(children == 0)),
+        "confidence": {
+            "mean": float(arrays.confidence.mean()) if count else None,
+            "min": float(arrays.confidence.min()) if count else None,
+            "max": float(arrays.confidence.max()) if count else None,
+            "low_confidence_nodes": int(np.count_nonzero(arrays.confidence < 0.6)),
+            "histogram": {
+                "bin_edges": edges.tolist(),
+                "counts": counts.tolist()
+            }
+        },
+        "depth": {
+            "max": int(arrays.depth.max()) if count else None,
+            "mean": float(arrays.depth.mean()) if count else None,
+            "distribution": np.bincount(arrays.depth).tolist(),
+            "current_path_length": int(np.count_nonzero(arrays.on_path))
+        },
+        "branching": {
+            "branch_points": int(np.count_nonzero(arrays.branch_point)),
+            "mean_branching_factor": float(internal.mean()) if internal.size else 0.0,
+            "max_branching_factor": int(internal.max()) if internal.size else 0
+        },
+        "backtracks": {
+            "count": backtracks,
+            "per_node": backtracks / count if count else 0.0
+        },
+        "alternatives": {
+            "explored": explored,
+            "unexplored": unexplored,
+            "explored_to_unexplored": explored / unexplored if unexplored else None
+        }
+    }
+
+
+def analyze_graph(graph: ThoughtGraph, bins: int = 10) -> dict:
+    """Export a graph to columnar arrays and compute its metrics."""
+    return analyze_arrays(graph_to_arrays(graph), bins=bins)
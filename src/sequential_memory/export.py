@@ -0,0 +1,168 @@
+"""Streaming exporters for thought graphs."""
+
+import json
+from typing import Dict, Iterator, List, Optional, Set, TextIO, Tuple
+
+from .graph import ThoughtGraph, Node, Edge
+
+
+EXPORT_FORMATS = ("ndjson", "dot")
+
+
+def check_export_args(graph: ThoughtGraph, format: str = "ndjson",
+                      root: Optional[str] = None,
+                      max_depth: Optional[int] = None):
+    """
+    Validate export arguments before anything is written.
+
+    Raises:
+        ValueError: If the format, root or depth is invalid
+    """
+    if format not in EXPORT_FORMATS:
+        raise ValueError(f"Format must be one of: {', '.join(EXPORT_FORMATS)}")
+    if root is not None and root not in graph.nodes:
+        raise ValueError(f"Unknown node: {root}")
+    if max_depth is not None and max_depth < 0:
+        raise ValueError("Max depth cannot be negative")
+
+
+def iter_nodes(graph: ThoughtGraph, root: Optional[str] = None,
+               max_depth: Optional[int] = None) -> Iterator[Tuple[Node, Optional[int]]]:
+    """
+    Yield nodes with their depth, parents before children.
+
+    Args:
+        graph: The graph to walk
+        root: Only walk the subtree under this node
+        max_depth: Only walk this many levels below the starting nodes
+
+    Yields:
+        (node, depth) pairs, where depth is relative to the starting nodes,
+        or None when the whole graph is walked unfiltered
+    """
+    if root is not None and root not in graph.nodes:
+        raise ValueError(f"Unknown node: {root}")
+
+    if root is None and max_depth is None:
+        # No filters: stream in insertion order, which puts parents first
+        for node in graph.nodes.values():
+            yield node, None
+        return
+
+    children: Dict[str, List[str]] = {}
+    roots = []
+    for node in graph.nodes.values():
+        if node.parent in graph.nodes:
+            children.setdefault(node.parent, []).append(node.id)
+        else:
+            roots.append(node.id)
+
+    stack = [(node_id, 0) for node_id in reversed([root] if root is not None else roots)]
+    while stack:
+        node_id, depth = stack.pop()
+        yield graph.nodes[node_id], depth
+        if max_depth is None or depth < max_depth:
+            for child_id in reversed(children.get(node_id, [])):
+                stack.append((child_id, depth + 1))
+
+
+def iter_edges(graph: ThoughtGraph,
+               node_ids: Optional[Set[str]] = None) -> Iterator[Edge]:
+    """Yield edges, optionally only those between the given nodes."""
+    for edge in graph.edges:
+        if node_ids is None or (edge.from_node in node_ids and edge.to_node in node_ids):
+            yield edge
+
+
+def iter_ndjson(graph: ThoughtGraph, root: Optional[str] = None,
+                max_depth: Optional[int] = None) -> Iterator[str]:
+    """
+    Yield the graph as newline-delimited JSON records.
+
+    The first record describes the graph, followed by one record per node
+    and then one per edge.
+    """
+    yield json.dumps({
+        "type": "graph",
+        "current_node": graph.current_node,
+        "node_counter": graph.node_counter
+    }) + "\n"
+
+    filtered = root is not None or max_depth is not None
+    node_ids: Optional[Set[str]] = set() if filtered else None
+
+    for node, _ in iter_nodes(graph, root, max_depth):
+        if filtered:
+            node_ids.add(node.id)
+        yield json.dumps({"type": "node", **node.to_dict()}) + "\n"
+
+    for edge in iter_edges(graph, node_ids):
+        yield json.dumps({"type": "edge", **edge.to_dict()}) + "\n"
+
+
+def _dot_quote(text: str) -> str:
+    """Quote a string for use as a DOT id or label."""
+    escaped = text.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+    return f'"{escaped}"'
+
+
+def iter_dot(graph: ThoughtGraph, root: Optional[str] = None,
+             max_depth: Optional[int] = None) -> Iterator[str]:
+    """
+    Yield the graph as Graphviz DOT source.
+
+    Branch points are drawn as diamonds, unselected alternatives and their
+    edges are dashed, and the current node is drawn bold.
+    """
+    yield "digraph thoughts {\n"
+    yield "  node [shape=box];\n"
+
+    filtered = root is not None or max_depth is not None
+    node_ids: Optional[Set[str]] = set() if filtered else None
+
+    for node, _ in iter_nodes(graph, root, max_depth):
+        if filtered:
+            node_ids.add(node.id)
+        attrs = [f"label={_dot_quote(f'{node.thought} ({node.confidence:.2f})')}"]
+        if node.branch_point:
+            attrs.append("shape=diamond")
+        if not node.selected:
+            attrs.append("style=dashed")
+        if node.id == graph.current_node:
+            attrs.append("penwidth=2")
+        yield f"  {_dot_quote(node.id)} [{', '.join(attrs)}];\n"
+
+    for edge in iter_edges(graph, node_ids):
+        style = "" if edge.selected else " [style=dashed]"
+        yield f"  {_dot_quote(edge.from_node)} -> {_dot_quote(edge.to_node)}{style};\n"
+
+    yield "}\n"
+
+
+def export_graph(graph: ThoughtGraph, stream: TextIO, format: str = "ndjson",
+                 root: Optional[str] = None,
+                 max_depth: Optional[int] = None) -> int:
+    """
+    Write the graph to a text stream incrementally.
+
+    Args:
+        graph: The graph to export
+        stream: Writable text stream
+        format: "ndjson" or "dot"
+        root: Only export the subtree under this node
+        max_depth: Only export this many levels below the root(s)
+
+    Returns:
+        Number of lines written
+    """
+    check_export_args(graph, format, root, max_depth)
+    if format == "ndjson":
+        lines = iter_ndjson(graph, root, max_depth)
+    else:
+        lines = iter_dot(graph, root, max_depth)
+
+    count = 0
+    for line in lines:
+        stream.write(line)
+        count += 1
+    return count
@@ -1,21 +1,56 @@
 """In-memory graph implementation for sequential thinking with memory."""
 
+from array import array
 from dataclasses import dataclass, field
 from datetime import datetime
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple, Union
 import json
+import sys
+
+from .textstore import TextRef, TextStore
+
+
+# Rough per-node overhead (dataclass, dict entry, edge) used for byte budgets
+NODE_OVERHEAD_BYTES = 400
+
+# Number of characters of the original thought kept in a compacted stub
+STUB_THOUGHT_CHARS = 80
+
+
+class _ThoughtField:
+    """Descriptor storing a node's thought inline or as a `TextRef`.
+    
+    Reading always returns the text; the raw value lives in `_thought`.
+    """
+    
+    def __get__(self, node: Optional["Node"], owner: type = None) -> str:
+        if node is None:
+            # No class-level default, so `thought` stays a required argument
+            raise AttributeError("thought")
+        thought = node._thought
+        if isinstance(thought, TextRef):
+            return thought.resolve()
+        return thought
+    
+    def __set__(self, node: "Node", value: Union[str, TextRef]):
+        node._thought = value
 
 
 @dataclass
 class Node:
-    """Represents a thought node in the graph."""
+    """Represents a thought node in the graph.
+    
+    `thought` may be given as a `TextRef` into the owning graph's text
+    store; it is always read back as the text.
+    """
     id: str
-    thought: str
+    thought: str = _ThoughtField()
     confidence: float
     parent: Optional[str] = None
     created_at: str = field(default_factory=lambda: datetime.now().isoformat())
     selected: bool = True
     branch_point: bool = False
+    compacted: int = 0
     
     def to_dict(self) -> dict:
         """Convert node to dictionary for JSON serialization."""
@@ -26,7 +61,8 @@ class Node:
             "parent": self.parent,
             "created_at": self.created_at,
             "selected": self.selected,
-            "branch_point": self.branch_point
+            "branch_point": self.branch_point,
+            "compacted": self.compacted
         }
 
 
@@ -46,15 +82,94 @@ class Edge:
         }
 
 
+@dataclass
+class RetentionPolicy:
+    """Limits on how much abandoned exploration a graph keeps.
+    
+    Subtrees off the current path are compacted, coldest first, once the
+    graph exceeds `max_nodes` or `max_bytes`, until it is back under
+    `low_water` of the budget. Subtrees with no activity for `max_age`
+    seconds are compacted regardless of size. Compacted subtrees become a
+    stub of their root node, keeping any unexplored alternatives and the
+    branch points above them, unless `drop` is set, in which case they are
+    removed outright. Stubs are dropped too if that is still not enough.
+    When compaction cannot get back under `low_water`, it is retried only
+    every `check_interval` inserts.
+    """
+    max_nodes: Optional[int] = None
+    max_age: Optional[float] = None
+    max_bytes: Optional[int] = None
+    drop: bool = False
+    low_water: float = 0.8
+    check_interval: int = 100
+
+
+def iter_dict_records(data: dict) -> Iterator[dict]:
+    """Yield the output of `ThoughtGraph.to_dict` as export-style records."""
+    yield {
+        "type": "graph",
+        "current_node": data.get("current_node"),
+        "node_counter": data.get("node_counter")
+    }
+    for node_id, node_data in data["nodes"].items():
+        yield {"type": "node", **node_data, "id": node_id}
+    for edge_data in data["edges"]:
+        yield {"type": "edge", **edge_data}
+
+
+def _estimate_node_bytes(node: Node) -> int:
+    """Estimate the resident size of a node, apart from text in the store.
+    
+    Stored texts are charged once, when their entry is created, so nodes
+    sharing a text do not count it again.
+    """
+    thought = node._thought
+    if isinstance(thought, TextRef):
+        return NODE_OVERHEAD_BYTES
+    return sys.getsizeof(thought) + NODE_OVERHEAD_BYTES
+
+
+class _Columns:
+    """Columnar copy of node fields, one row per node in insertion order."""
+    
+    __slots__ = ("rows", "parent", "confidence", "selected", "branch_point")
+    
+    def __init__(self, nodes: Iterable[Node]):
+        """Build the columns from nodes, parents before children."""
+        self.rows: Dict[str, int] = {}
+        self.parent = array("q")
+        self.confidence = array("d")
+        self.selected = array("b")
+        self.branch_point = array("b")
+        for node in nodes:
+            self.append(node)
+    
+    def append(self, node: Node):
+        """Add a row for a node."""
+        self.rows[node.id] = len(self.rows)
+        self.parent.append(self.rows.get(node.parent, -1))
+        self.confidence.append(node.confidence)
+        self.selected.append(node.selected)
+        self.branch_point.append(node.branch_point)
+
+
 class ThoughtGraph:
     """Manages the thought graph structure and operations."""
     
-    def __init__(self):
+    def __init__(self, retention: Optional[RetentionPolicy] = None,
+                 text_store: Optional[TextStore] = None):
         """Initialize an empty thought graph."""
+        self.texts = text_store if text_store is not None else TextStore()
         self.nodes: Dict[str, Node] = {}
         self.edges: List[Edge] = []
         self.current_node: Optional[str] = None
         self.node_counter: int = 0
+        self.retention = retention
+        self._bytes: int = 0
+        self._adds_since_compact: int = 0
+        self._compact_backoff: bool = False
+        # Built on first use by get_columns, dropped when nodes are removed
+        self._columns: Optional[_Columns] = None
     
     def _generate_node_id(self) -> str:
         """Generate a unique node ID."""
@@ -64,16 +179,25 @@ class ThoughtGraph:
     def add_node(self, thought: str, confidence: float, 
                  parent: Optional[str] = None, selected: bool = True) -> Node:
         """Add a new thought node to the graph."""
+        node = self._insert_node(thought, confidence, parent, selected)
+        self._maybe_compact()
+        return node
+    
+    def _insert_node(self, thought: str, confidence: float,
+                     parent: Optional[str], selected: bool) -> Node:
+        """Insert a node without applying the retention policy."""
         node_id = self._generate_node_id()
         node = Node(
             id=node_id,
-            thought=thought,
+            thought=self._put_text(thought),
             confidence=confidence,
             parent=parent,
             selected=selected,
             branch_point=(confidence < 0.6)
         )
         self.nodes[node_id] = node
+        if self._columns is not None:
+            self._columns.append(node)
         
         # Add edge from parent if exists
         if parent and parent in self.nodes:
@@ -84,8 +208,39 @@ class ThoughtGraph:
         if selected:
             self.current_node = node_id
         
+        self._bytes += _estimate_node_bytes(node)
+        self._adds_since_compact += 1
+        
         return node
     
+    def get_columns(self) -> dict:
+        """
+        Get the node fields as columns, one row per node in insertion order.
+        
+        The columns are built on the first call and then extended as nodes
+        are added, so repeated calls stay cheap; removing nodes discards
+        them until the next call. They are owned by the graph and must not
+        be modified.
+        
+        Returns:
+            Node ids, `path_rows` (rows of the current path, root first),
+            plus `parent` (row of the parent, -1 for roots), `confidence`,
+            `selected` and `branch_point` arrays
+        """
+        if self._columns is None:
+            self._columns = _Columns(self.nodes.values())
+        columns = self._columns
+        path_rows = [columns.rows[node_id] for node_id in self.get_current_path()
+                     if node_id in columns.rows]
+        return {
+            "ids": list(columns.rows),
+            "path_rows": path_rows,
+            "parent": columns.parent,
+            "confidence": columns.confidence,
+            "selected": columns.selected,
+            "branch_point": columns.branch_point
+        }
+    
     def get_current_path(self) -> List[str]:
         """Get the path from root to current node."""
         if not self.current_node:
@@ -176,16 +331,17 @@ class ThoughtGraph:
         parent_id = self.current_node
         created_nodes = []
         
-        # Create all alternative nodes
+        # Create all alternative nodes before compacting so none are lost
         for i, alt in enumerate(alternatives):
             is_selected = (i == selected_index)
-            node = self.add_node(
+            node = self._insert_node(
                 thought=alt["thought"],
                 confidence=alt["confidence"],
                 parent=parent_id,
                 selected=is_selected
             )
             created_nodes.append(node)
+        self._maybe_compact()
         
         # Return the selected node
         if 0 <= selected_index < len(created_nodes):
@@ -193,6 +349,184 @@ class ThoughtGraph:
         
         return None
     
+    def _maybe_compact(self):
+        """Compact the graph if the retention policy calls for it."""
+        if self.retention and self._should_compact():
+            self.compact()
+    
+    def _should_compact(self) -> bool:
+        """Check whether the retention policy calls for compaction."""
+        policy = self.retention
+        interval_elapsed = self._adds_since_compact >= policy.check_interval
+        if self._over_budget(low_water=False):
+            # Back off when the last compaction could not reach low water
+            if not self._compact_backoff or interval_elapsed:
+                return True
+        if policy.max_age is not None:
+            return interval_elapsed
+        return False
+    
+    def _over_budget(self, low_water: bool) -> bool:
+        """Check whether the graph is above its node or byte budget."""
+        policy = self.retention
+        scale = policy.low_water if low_water else 1.0
+        if policy.max_nodes is not None and len(self.nodes) > policy.max_nodes * scale:
+            return True
+        if policy.max_bytes is not None and self._bytes > policy.max_bytes * scale:
+            return True
+        return False
+    
+    def _remove_nodes(self, node_ids: List[str]):
+        """Remove nodes; their edges are pruned separately."""
+        for node_id in node_ids:
+            node = self.nodes.pop(node_id)
+            self._bytes -= _estimate_node_bytes(node)
+            self._release_thought(node)
+    
+    def _put_text(self, text: str) -> Union[str, TextRef]:
+        """Store a text, charging the byte budget if it is new to the store."""
+        before = self.texts.stored_bytes
+        thought = self.texts.put(text)
+        self._bytes += self.texts.stored_bytes - before
+        return thought
+    
+    def _release_thought(self, node: Node):
+        """Drop a node's reference to its stored text, crediting freed bytes."""
+        if isinstance(node._thought, TextRef):
+            before = self.texts.stored_bytes
+            self.texts.release(node._thought)
+            self._bytes -= before - self.texts.stored_bytes
+    
+    def _stub_members(self, root_id: str, members: List[str]) -> List[str]:
+        """Get the members of a subtree that survive stubbing it.
+        
+        These are the root, every unselected child of a branch point, and
+        the nodes linking those alternatives back to the root.
+        """
+        kept = {root_id}
+        for member in members:
+            node = self.nodes[member]
+            parent = self.nodes.get(node.parent)
+            if node.selected or parent is None or not parent.branch_point:
+                continue
+            while member not in kept:
+                kept.add(member)
+                member = self.nodes[member].parent
+        return [member for member in members if member in kept]
+    
+    def _is_reported(self, root: Node, kept: List[str]) -> bool:
+        """Check whether `get_unexplored_branches` shows a stub root's thought.
+        
+        That is the case when the root is an unexplored alternative itself,
+        or a branch point that keeps one of its alternatives.
+        """
+        parent = self.nodes.get(root.parent)
+        if not root.selected and parent is not None and parent.branch_point:
+            return True
+        if root.branch_point:
+            return any(not self.nodes[member].selected and self.nodes[member].parent == root.id
+                       for member in kept)
+        return False
+    
+    def compact(self) -> int:
+        """
+        Apply the retention policy to subtrees off the current path.
+        
+        Node ids are never reused, and nodes on the current path are never
+        touched. Stubbing keeps unexplored alternatives and their branch
+        points, so `get_unexplored_branches` reports the same as before.
+        The stub root's `compacted` count records how many nodes were
+        removed beneath it, and its thought is shortened unless that
+        report shows it.
+        
+        Returns:
+            Number of nodes removed from the graph
+        """
+        policy = self.retention
+        self._adds_since_compact = 0
+        if not policy:
+            return 0
+        
+        on_path = set(self.get_current_path())
+        children: Dict[str, List[str]] = {}
+        for node in self.nodes.values():
+            if node.parent in self.nodes:
+                children.setdefault(node.parent, []).append(node.id)
+        
+        # Maximal subtrees hanging off the current path, with their last activity
+        subtrees: List[Tuple[str, str, List[str]]] = []
+        for node_id, node in self.nodes.items():
+            if node_id in on_path or (node.parent in self.nodes and node.parent not in on_path):
+                continue
+            members = []
+            last_active = node.created_at
+            stack = [node_id]
+            while stack:
+                member = stack.pop()
+                members.append(member)
+                last_active = max(last_active, self.nodes[member].created_at)
+                stack.extend(children.get(member, []))
+            subtrees.append((last_active, node_id, members))
+        subtrees.sort()
+        
+        cutoff = None
+        if policy.max_age is not None:
+            cutoff = datetime.fromtimestamp(
+                datetime.now().timestamp() - policy.max_age
+            ).isoformat()
+        
+        def is_due(last_active: str) -> bool:
+            if cutoff is not None and last_active < cutoff:
+                return True
+            return self._over_budget(low_water=True)
+        
+        removed = 0
+        remaining = []
+        
+        # Stub pass: collapse each subtree onto its root and alternatives
+        for last_active, root_id, members in subtrees:
+            if policy.drop or not is_due(last_active):
+                remaining.append((last_active, root_id, members))
+                continue
+            kept = self._stub_members(root_id, members)
+            if len(kept) == len(members):
+                # Nothing to collapse, e.g. a lone alternative or an existing stub
+                remaining.append((last_active, root_id, members))
+                continue
+            kept_ids = set(kept)
+            self._remove_nodes([member for member in members if member not in kept_ids])
+            root = self.nodes[root_id]
+            self._bytes -= _estimate_node_bytes(root)
+            if len(root.thought) > STUB_THOUGHT_CHARS and not self._is_reported(root, kept):
+                stub = root.thought[:STUB_THOUGHT_CHARS] + "..."
+                self._release_thought(root)
+                root._thought = self._put_text(stub)
+            root.compacted += len(members) - len(kept)
+            self._bytes += _estimate_node_bytes(root)
+            removed += len(members) - len(kept)
+            remaining.append((last_active, root_id, kept))
+        
+        # Drop pass: remove whole subtrees while still due
+        if policy.drop or self._over_budget(low_water=True):
+            for last_active, root_id, members in sorted(remaining):
+                if policy.drop:
+                    if not is_due(last_active):
+                        continue
+                elif not self._over_budget(low_water=True):
+                    break
+                self._remove_nodes(members)
+                removed += len(members)
+        
+        if removed:
+            self.edges = [
+                edge for edge in self.edges
+                if edge.from_node in self.nodes and edge.to_node in self.nodes
+            ]
+            self._columns = None
+        
+        self._compact_backoff = self._over_budget(low_water=True)
+        return removed
+    
     def to_dict(self) -> dict:
         """Convert the entire graph to a dictionary."""
         return {
@@ -201,3 +535,110 @@ class ThoughtGraph:
             "current_node": self.current_node,
             "node_counter": self.node_counter
         }
+    
+    def bulk_insert(self, records: Iterable[dict], remap_ids: bool = True,
+                    dedupe_roots: bool = False) -> Dict[str, str]:
+        """
+        Insert serialized nodes and edges in a single pass.
+        
+        Records are "graph", "node" and "edge" dicts as written by the
+        NDJSON exporter, with parents before their children. The retention
+        policy is applied once at the end rather than per node, and the
+        current node is only taken from the records if the graph has none.
+        
+        Args:
+            records: The records to insert
+            remap_ids: Give every node a fresh id from this graph; otherwise
+                keep the ids as they are
+            dedupe_roots: Reuse existing nodes for incoming nodes with the
+                same parent, thought and confidence, so shared root
+                prefixes are stored once
+            
+        Returns:
+            Mapping from incoming node ids to their ids in this graph
+        """
+        id_map: Dict[str, str] = {}
+        reused: Set[str] = set()
+        incoming_current: Optional[str] = None
+        incoming_counter = 0
+        
+        # Existing nodes keyed by what makes a prefix identical, built once
+        existing: Dict[Tuple[Optional[str], str, float], str] = {}
+        if dedupe_roots:
+            for node in self.nodes.values():
+                existing.setdefault((node.parent, node.thought, node.confidence), node.id)
+        
+        added = 0
+        for record in records:
+            kind = record.get("type")
+            
+            if kind == "graph":
+                incoming_current = record.get("current_node")
+                incoming_counter = record.get("node_counter") or 0
+            
+            elif kind == "node":
+                thought = record["thought"]
+                confidence = record["confidence"]
+                if remap_ids:
+                    parent = id_map.get(record.get("parent"))
+                else:
+                    parent = record.get("parent")
+                
+                if dedupe_roots and (parent is None or parent in reused):
+                    match = existing.get((parent, thought, confidence))
+                    if match is not None:
+                        id_map[record["id"]] = match
+                        reused.add(match)
+                        continue
+                
+                if remap_ids:
+                    node_id = self._generate_node_id()
+                elif record["id"] in self.nodes:
+                    raise ValueError(f"Duplicate node id: {record['id']}")
+                else:
+                    node_id = record["id"]
+                
+                node = Node(
+                    id=node_id,
+                    thought=self._put_text(thought),
+                    confidence=confidence,
+                    parent=parent,
+                    selected=record.get("selected", True),
+                    branch_point=record.get("branch_point", confidence < 0.6),
+                    compacted=record.get("compacted", 0)
+                )
+                if "created_at" in record:
+                    node.created_at = record["created_at"]
+                self.nodes[node_id] = node
+                if self._columns is not None:
+                    self._columns.append(node)
+                self._bytes += _estimate_node_bytes(node)
+                id_map[record["id"]] = node_id
+                added += 1
+            
+            elif kind == "edge":
+                from_node = id_map.get(record["from"])
+                to_node = id_map.get(record["to"])
+                if from_node is None or to_node is None or to_node in reused:
+                    continue
+                self.edges.append(Edge(from_node=from_node, to_node=to_node,
+                                       selected=record.get("selected", True)))
+        
+        if not remap_ids:
+            self.node_counter = max(self.node_counter, incoming_counter or added)
+        
+        if self.current_node is None and incoming_current in id_map:
+            self.current_node = id_map[incoming_current]
+        
+        self._adds_since_compact += added
+        self._maybe_compact()
+        
+        return id_map
+    
+    @classmethod
+    def from_dict(cls, data: dict,
+                  retention: Optional[RetentionPolicy] = None) -> "ThoughtGraph":
+        """Rebuild a graph, ids included, from the output of `to_dict`."""
+        graph = cls(retention=retention)
+        graph.bulk_insert(iter_dict_records(data), remap_ids=False)
+        return graph
@@ -0,0 +1,76 @@
+"""Bulk import and merge of serialized thought graphs."""
+
+import json
+from typing import Dict, Iterable, Iterator, TextIO, Union
+
+from .graph import ThoughtGraph, iter_dict_records
+
+
+GraphSource = Union[dict, Iterable[str], Iterable[dict]]
+
+
+def iter_records(source: GraphSource) -> Iterator[dict]:
+    """
+    Yield NDJSON-style records from a serialized graph.
+
+    Args:
+        source: A dict in `ThoughtGraph.to_dict` format, an iterable of
+            NDJSON lines as written by the NDJSON exporter, or an iterable
+            of already parsed records
+
+    Yields:
+        A "graph" record, then "node" records, then "edge" records
+    """
+    if isinstance(source, dict):
+        yield from iter_dict_records(source)
+        return
+
+    for line in source:
+        if isinstance(line, dict):
+            yield line
+            continue
+        line = line.strip()
+        if line:
+            yield json.loads(line)
+
+
+def read_records(stream: TextIO) -> Iterator[dict]:
+    """
+    Yield records from a file holding either format.
+
+    NDJSON is read line by line; a `to_dict` JSON document is loaded whole.
+    """
+    first = stream.readline()
+    try:
+        record = json.loads(first)
+    except json.JSONDecodeError:
+        record = None
+
+    if isinstance(record, dict) and "type" in record:
+        yield record
+        yield from iter_records(stream)
+    else:
+        yield from iter_records(json.loads(first + stream.read()))
+
+
+def import_graph(graph: ThoughtGraph, source: GraphSource,
+                 dedupe_roots: bool = False) -> Dict[str, str]:
+    """
+    Merge a serialized graph into `graph` in a single pass.
+
+    Every imported node gets a fresh id from `graph`, so ids and
+    `node_counter` never collide with existing nodes. Parents must appear
+    before their children, as they do in `to_dict` output and in exports;
+    a node whose parent was not imported becomes a root.
+
+    Args:
+        graph: The graph to import into
+        source: A `to_dict` dict, NDJSON lines or records (see `iter_records`)
+        dedupe_roots: Reuse existing nodes for imported nodes with the same
+            parent, thought and confidence, so shared root prefixes of
+            merged sessions are stored once
+
+    Returns:
+        Mapping from imported node ids to their ids in `graph`
+    """
+    return graph.bulk_insert(iter_records(source), dedupe_roots=dedupe_roots)
@@ -1,14 +1,19 @@
 """Main MCP server implementation for sequential memory."""
 
+import argparse
+import asyncio
 import json
 import logging
 import sys
-from typing import Any, Dict
+from typing import Any, Dict, Optional
 
 from mcp.server import Server
 from mcp.server.stdio import stdio_server
 from mcp.types import Tool, TextContent
 
+from .export import EXPORT_FORMATS, check_export_args, export_graph
+from .graph import RetentionPolicy, ThoughtGraph
+from .sharding import ShardedDispatcher
 from .tools import SequentialMemoryTools, TOOL_DEFINITIONS
 
 
@@ -20,13 +25,32 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Session used for calls that do not carry a session_id
+DEFAULT_SESSION = "default"
+
+SESSION_ID_SCHEMA = {
+    "type": "string",
+    "description": "Session to route this call to when running with workers"
+}
+
 
 class SequentialMemoryServer:
     """MCP server for sequential thinking with memory."""
     
-    def __init__(self):
-        """Initialize the server and tools."""
-        self.tools = SequentialMemoryTools()
+    def __init__(self, workers: int = 0,
+                 retention: Optional[RetentionPolicy] = None):
+        """
+        Initialize the server and tools.
+        
+        Args:
+            workers: Number of worker processes to shard sessions across.
+                With 0, all calls are handled in-process on one graph.
+            retention: Optional limits applied to every session's graph
+        """
+        self.tools = SequentialMemoryTools(retention=retention)
+        self.dispatcher: Optional[ShardedDispatcher] = None
+        if workers > 0:
+            self.dispatcher = ShardedDispatcher(workers, retention=retention)
         self.server = Server("sequential-memory")
         self._setup_handlers()
     
@@ -36,33 +60,29 @@ class SequentialMemoryServer:
         @self.server.list_tools()
         async def list_tools() -> list[Tool]:
             """Return the list of available tools."""
-            return [
-                Tool(**tool_def) for tool_def in TOOL_DEFINITIONS
-            ]
+            tools = []
+            for tool_def in TOOL_DEFINITIONS:
+                if self.dispatcher:
+                    schema = dict(tool_def["inputSchema"])
+                    schema["properties"] = dict(schema["properties"],
+                                                session_id=SESSION_ID_SCHEMA)
+                    tool_def = dict(tool_def, inputSchema=schema)
+                tools.append(Tool(**tool_def))
+            return tools
         
         @self.server.call_tool()
         async def call_tool(name: str, arguments: Dict[str, Any]) -> list[TextContent]:
             """Handle tool calls."""
             try:
-                # Route to appropriate tool handler
-                if name == "think":
-                    result = self.tools.think(
-                        thought=arguments["thought"],
-                        confidence=arguments["confidence"]
-                    )
-                elif name == "select_path":
-                    result = self.tools.select_path(
-                        alternatives=arguments["alternatives"],
-                        selected_index=arguments["selected_index"]
+                session_id = arguments.pop("session_id", DEFAULT_SESSION)
+                
+                # Route to the owning worker, or handle in-process
+                if self.dispatcher:
+                    result = await asyncio.to_thread(
+                        self.dispatcher.call, session_id, name, arguments
                     )
-                elif name == "backtrack":
-                    result = self.tools.backtrack()
-                elif name == "show_current_path":
-                    result = self.tools.show_current_path()
-                elif name == "get_unexplored_branches":
-                    result = self.tools.get_unexplored_branches()
                 else:
-                    result = {"error": f"Unknown tool: {name}"}
+                    result = self.tools.dispatch(name, arguments)
                 
                 # Return result as JSON text
                 return [TextContent(
@@ -83,16 +103,92 @@ class SequentialMemoryServer:
     
     async def run(self):
         """Run the server."""
-        async with stdio_server() as (read_stream, write_stream):
-            logger.info("Sequential Memory MCP Server starting...")
-            await self.server.run(read_stream, write_stream)
+        try:
+            async with stdio_server() as (read_stream, write_stream):
+                logger.info("Sequential Memory MCP Server starting...")
+                await self.server.run(read_stream, write_stream)
+        finally:
+            if self.dispatcher:
+                self.dispatcher.close()
+
+
+def export_command(args: argparse.Namespace):
+    """Export a saved graph (from `ThoughtGraph.to_dict`) as NDJSON or DOT."""
+    with open(args.input, "r", encoding="utf-8") as f:
+        graph = ThoughtGraph.from_dict(json.load(f))
+    
+    try:
+        check_export_args(graph, args.format, args.root, args.max_depth)
+    except ValueError as e:
+        sys.exit(f"sequential-memory export: {e}")
+    
+    if args.output == "-":
+        export_graph(graph, sys.stdout, format=args.format,
+                     root=args.root, max_depth=args.max_depth)
+    else:
+        with open(args.output, "w", encoding="utf-8") as f:
+            export_graph(graph, f, format=args.format,
+                         root=args.root, max_depth=args.max_depth)
 
 
 def main():
     """Main entry point."""
-    import asyncio
+    parser = argparse.ArgumentParser(prog="sequential-memory")
+    parser.add_argument(
+        "--workers", type=int, default=0,
+        help="Shard sessions across this many worker processes (default: in-process)"
+    )
+    parser.add_argument(
+        "--max-nodes", type=int,
+        help="Compact abandoned branches once a graph holds more nodes than this"
+    )
+    parser.add_argument(
+        "--max-bytes", type=int,
+        help="Compact abandoned branches once a graph uses more bytes than this"
+    )
+    parser.add_argument(
+        "--max-age", type=float,
+        help="Compact abandoned branches idle for more than this many seconds"
+    )
+    parser.add_argument(
+        "--drop-compacted", action="store_true",
+        help="Drop compacted branches instead of keeping summary stubs"
+    )
+    
+    subparsers = parser.add_subparsers(dest="command")
+    export_parser = subparsers.add_parser(
+        "export", help="Export a saved graph as NDJSON or Graphviz DOT"
+    )
+    export_parser.add_argument("input", help="Graph JSON file to export")
+    export_parser.add_argument(
+        "-o", "--output", default="-",
+        help="File to write (default: stdout)"
+    )
+    export_parser.add_argument(
+        "--format", choices=EXPORT_FORMATS, default="ndjson",
+        help="Export format (default: ndjson)"
+    )
+    export_parser.add_argument("--root", help="Only export the subtree under this node ID")
+    export_parser.add_argument(
+        "--max-depth", type=int,
+        help="Only export this many levels below the root"
+    )
+    args = parser.parse_args()
+    
+    if args.command == "export":
+        export_command(args)
+        return
+    
+    retention = None
+    if args.max_nodes or args.max_bytes or args.max_age:
+        retention = RetentionPolicy(
+            max_nodes=args.max_nodes,
+            max_bytes=args.max_bytes,
+            max_age=args.max_age,
+            drop=args.drop_compacted
+        )
     
-    server = SequentialMemoryServer()
+    server = SequentialMemoryServer(workers=args.workers, retention=retention)
     try:
         asyncio.run(server.run())
     except KeyboardInterrupt:
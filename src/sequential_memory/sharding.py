@@ -0,0 +1,249 @@
+"""Multi-process sharding of thought graphs across worker processes."""
+
+import bisect
+import hashlib
+import json
+import logging
+import multiprocessing
+import os
+import shutil
+import tempfile
+import threading
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
+
+from .graph import RetentionPolicy
+from .tools import SequentialMemoryTools
+
+
+logger = logging.getLogger(__name__)
+
+# Tools that mutate a session's graph and must be replayed on recovery
+JOURNALED_TOOLS = {"think", "select_path", "backtrack", "import_graph"}
+
+# Result fields a replayed call must reproduce exactly
+REPLAY_CHECKED_FIELDS = ("current_node_id", "created_nodes", "imported_nodes")
+
+
+def _hash_key(key: str) -> int:
+    """Hash a key onto the ring."""
+    return int.from_bytes(hashlib.md5(key.encode("utf-8")).digest()[:8], "big")
+
+
+class HashRing:
+    """Consistent hash ring mapping session ids to worker indexes."""
+
+    def __init__(self, num_workers: int, replicas: int = 64):
+        """Build a ring with `replicas` virtual points per worker."""
+        if num_workers < 1:
+            raise ValueError("Number of workers must be at least 1")
+
+        points = []
+        for worker in range(num_workers):
+            for replica in range(replicas):
+                points.append((_hash_key(f"worker-{worker}#{replica}"), worker))
+        points.sort()
+
+        self._keys = [point for point, _ in points]
+        self._workers = [worker for _, worker in points]
+
+    def get_worker(self, session_id: str) -> int:
+        """Get the index of the worker owning a session."""
+        index = bisect.bisect(self._keys, _hash_key(session_id))
+        if index == len(self._keys):
+            index = 0
+        return self._workers[index]
+
+
+def _worker_main(conn, retention: Optional[RetentionPolicy]):
+    """Serve tool calls for the sessions owned by this worker."""
+    sessions: Dict[str, SequentialMemoryTools] = {}
+
+    while True:
+        try:
+            message = conn.recv()
+        except EOFError:
+            break
+        if message is None:
+            break
+
+        session_id, name, arguments = message
+        tools = sessions.get(session_id)
+        if tools is None:
+            tools = sessions[session_id] = SequentialMemoryTools(retention=retention)
+
+        try:
+            result = tools.dispatch(name, arguments)
+        except Exception as e:
+            result = {"error": str(e), "tool": name}
+        conn.send(result)
+
+    conn.close()
+
+
+class _Worker:
+    """Handle on a single worker process and its pipe."""
+
+    def __init__(self, context, retention: Optional[RetentionPolicy]):
+        """Start the worker process."""
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(target=_worker_main,
+                                       args=(child_conn, retention),
+                                       daemon=True)
+        self.process.start()
+        child_conn.close()
+        self.lock = threading.Lock()
+
+    def call(self, session_id: str, name: str, arguments: Dict[str, Any]) -> dict:
+        """Send one tool call and wait for its result."""
+        self.conn.send((session_id, name, arguments))
+        return self.conn.recv()
+
+    def stop(self, timeout: float = 5.0):
+        """Ask the worker to exit and wait for it."""
+        try:
+            self.conn.send(None)
+        except (BrokenPipeError, OSError):
+            pass
+        self.process.join(timeout)
+        if self.process.is_alive():
+            self.process.terminate()
+            self.process.join()
+        self.conn.close()
+
+
+class ShardedDispatcher:
+    """Routes each session's tool calls to one of N worker processes.
+
+    Sessions are assigned to workers by consistent hashing on the session
+    id, and each graph stays resident in its owning worker. Only the tool
+    arguments and results cross the process boundary. Each session's
+    successful mutating calls are appended to a journal file in
+    `journal_dir`, so a restarted worker can rebuild its graphs by
+    replaying them while the dispatcher's own memory stays bounded.
+    """
+
+    def __init__(self, num_workers: int,
+                 retention: Optional[RetentionPolicy] = None,
+                 start_method: Optional[str] = "spawn",
+                 journal_dir: Optional[str] = None):
+        """Start `num_workers` worker processes."""
+        self.ring = HashRing(num_workers)
+        self.retention = retention
+        self._owns_journal_dir = journal_dir is None
+        self.journal_dir = journal_dir or tempfile.mkdtemp(prefix="sequential-memory-")
+        self._context = multiprocessing.get_context(start_method)
+        self._workers: List[_Worker] = [
+            _Worker(self._context, retention) for _ in range(num_workers)
+        ]
+        # Sessions with at least one journaled call
+        self._journaled: Set[str] = set()
+
+    @property
+    def num_workers(self) -> int:
+        """Number of worker processes."""
+        return len(self._workers)
+
+    def worker_for(self, session_id: str) -> int:
+        """Get the index of the worker owning a session."""
+        return self.ring.get_worker(session_id)
+
+    def call(self, session_id: str, name: str, arguments: Dict[str, Any]) -> dict:
+        """
+        Run a tool call in the worker owning the session.
+
+        If the worker has died it is restarted, its sessions are recovered
+        from the journal, and the call is retried once.
+
+        Args:
+            session_id: The session the call belongs to
+            name: The tool name
+            arguments: The tool arguments
+
+        Returns:
+            The tool result
+        """
+        index = self.worker_for(session_id)
+        worker = self._workers[index]
+
+        with worker.lock:
+            try:
+                result = worker.call(session_id, name, arguments)
+            except (EOFError, BrokenPipeError, ConnectionResetError, OSError):
+                logger.warning(f"Worker {index} died, restarting")
+                worker = self._restart_locked(index)
+                result = worker.call(session_id, name, arguments)
+
+            if name in JOURNALED_TOOLS and "error" not in result:
+                self._append_journal(session_id, name, arguments, result)
+
+        return result
+
+    def _journal_path(self, session_id: str) -> str:
+        """Get the journal file for a session."""
+        digest = hashlib.sha1(session_id.encode("utf-8")).hexdigest()
+        return os.path.join(self.journal_dir, f"{digest}.ndjson")
+
+    def _append_journal(self, session_id: str, name: str,
+                        arguments: Dict[str, Any], result: dict):
+        """Record a successful mutating call and the results it must reproduce."""
+        expected = {field: result[field] for field in REPLAY_CHECKED_FIELDS
+                    if field in result}
+        entry = json.dumps({"tool": name, "arguments": arguments, "expected": expected})
+        with open(self._journal_path(session_id), "a", encoding="utf-8") as f:
+            f.write(entry + "\n")
+        self._journaled.add(session_id)
+
+    def _iter_journal(self, session_id: str) -> Iterator[Tuple[str, Dict[str, Any], Dict[str, Any]]]:
+        """Yield a session's journaled calls in order."""
+        with open(self._journal_path(session_id), "r", encoding="utf-8") as f:
+            for line in f:
+                entry = json.loads(line)
+                yield entry["tool"], entry["arguments"], entry["expected"]
+
+    def restart_worker(self, index: int):
+        """Restart a worker and replay the journal of its sessions."""
+        with self._workers[index].lock:
+            self._restart_locked(index)
+
+    def _restart_locked(self, index: int) -> _Worker:
+        """Replace a worker, holding the old worker's lock."""
+        old = self._workers[index]
+        old.stop(timeout=1.0)
+
+        worker = _Worker(self._context, self.retention)
+        for session_id in self._journaled:
+            if self.worker_for(session_id) != index:
+                continue
+            for name, arguments, expected in self._iter_journal(session_id):
+                result = worker.call(session_id, name, arguments)
+                self._check_replay(worker, session_id, name, result, expected)
+
+        # Keep serializing callers that already hold a reference to the old lock
+        worker.lock = old.lock
+        self._workers[index] = worker
+        return worker
+
+    def _check_replay(self, worker: _Worker, session_id: str, name: str,
+                      result: dict, expected: Dict[str, Any]):
+        """Fail recovery if a replayed call errored or diverged."""
+        if "error" in result:
+            problem = result["error"]
+        else:
+            diverged = [field for field, value in expected.items()
+                        if result.get(field) != value]
+            if not diverged:
+                return
+            field = diverged[0]
+            problem = f"produced {field} {result.get(field)}, originally {expected[field]}"
+        worker.stop(timeout=1.0)
+        raise RuntimeError(
+            f"Failed to recover session {session_id}: replaying {name} {problem}"
+        )
+
+    def close(self):
+        """Stop all worker processes and remove owned journals."""
+        for worker in self._workers:
+            with worker.lock:
+                worker.stop()
+        if self._owns_journal_dir:
+            shutil.rmtree(self.journal_dir, ignore_errors=True)
@@ -0,0 +1,169 @@
+"""Content-addressed storage for thought text."""
+
+from collections import OrderedDict
+from typing import Dict, Union
+import hashlib
+import zlib
+
+
+# Texts shorter than this many bytes stay inline; an entry would cost more
+DEFAULT_MIN_SIZE = 256
+
+# Texts at least this many bytes long are stored zlib-compressed
+DEFAULT_COMPRESS_THRESHOLD = 512
+
+# Number of decompressed texts kept in the LRU cache
+DEFAULT_CACHE_SIZE = 256
+
+
+class TextRef:
+    """Handle on a text held in a TextStore."""
+
+    __slots__ = ("store", "key")
+
+    def __init__(self, store: "TextStore", key: bytes):
+        """Create a handle for a stored text."""
+        self.store = store
+        self.key = key
+
+    def resolve(self) -> str:
+        """Get the text this handle refers to."""
+        return self.store.get(self.key)
+
+    def __repr__(self) -> str:
+        return f"TextRef({self.key.hex()})"
+
+
+class _Entry:
+    """A stored text with its reference count."""
+
+    __slots__ = ("data", "ref", "refcount", "size")
+
+    def __init__(self, data: Union[str, bytes], ref: TextRef, size: int):
+        self.data = data
+        self.ref = ref
+        self.refcount = 1
+        self.size = size
+
+
+class TextStore:
+    """Holds each unique text once, keyed by content hash.
+
+    Texts are reference counted and freed when the last reference is
+    released. Long texts are compressed with zlib, and an LRU cache keeps
+    recently read ones decompressed so repeated path rendering stays cheap.
+    Texts shorter than `min_size` bytes are not stored at all: `put` hands
+    them back unchanged, since an entry and handle would outweigh them.
+    `stored_bytes` tracks the bytes held by all entries.
+    """
+
+    def __init__(self, compress_threshold: int = DEFAULT_COMPRESS_THRESHOLD,
+                 cache_size: int = DEFAULT_CACHE_SIZE,
+                 min_size: int = DEFAULT_MIN_SIZE):
+        """Initialize an empty store."""
+        self.min_size = min_size
+        self.compress_threshold = compress_threshold
+        self.cache_size = cache_size
+        self.stored_bytes = 0
+        self._entries: Dict[bytes, _Entry] = {}
+        self._cache: "OrderedDict[bytes, str]" = OrderedDict()
+
+    def put(self, text: str) -> Union[str, TextRef]:
+        """
+        Add a reference to a text, storing it if it is new.
+
+        Args:
+            text: The text to store
+
+        Returns:
+            The shared handle for this text, or the text itself if it is
+            shorter than `min_size`
+        """
+        encoded = text.encode("utf-8")
+        if len(encoded) < self.min_size:
+            return text
+
+        key = hashlib.blake2b(encoded, digest_size=16).digest()
+
+        entry = self._entries.get(key)
+        if entry is not None:
+            entry.refcount += 1
+            return entry.ref
+
+        data: Union[str, bytes] = text
+        if len(encoded) >= self.compress_threshold:
+            compressed = zlib.compress(encoded)
+            if len(compressed) < len(encoded):
+                data = compressed
+
+        ref = TextRef(self, key)
+        entry = self._entries[key] = _Entry(data, ref, len(encoded))
+        self.stored_bytes += self._entry_size(entry)
+        return ref
+
+    def get(self, key: bytes) -> str:
+        """Get a stored text by key."""
+        data = self._entries[key].data
+        if isinstance(data, str):
+            return data
+
+        text = self._cache.get(key)
+        if text is not None:
+            self._cache.move_to_end(key)
+            return text
+
+        text = zlib.decompress(data).decode("utf-8")
+        self._cache[key] = text
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return text
+
+    def stored_size(self, ref: TextRef) -> int:
+        """Get the number of bytes a text occupies in the store."""
+        return self._entry_size(self._entries[ref.key])
+    
+    @staticmethod
+    def _entry_size(entry: _Entry) -> int:
+        """Get the number of bytes an entry occupies."""
+        if isinstance(entry.data, bytes):
+            return len(entry.data)
+        return entry.size
+
+    def release(self, ref: TextRef):
+        """Drop a reference to a text, freeing it when none remain."""
+        entry = self._entries.get(ref.key)
+        if entry is None:
+            return
+        entry.refcount -= 1
+        if entry.refcount <= 0:
+            del self._entries[ref.key]
+            self._cache.pop(ref.key, None)
+            self.stored_bytes -= self._entry_size(entry)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> dict:
+        """Summarize how much the store is saving."""
+        references = 0
+        text_bytes = 0
+        stored_bytes = 0
+        raw_bytes = 0
+        compressed = 0
+        for entry in self._entries.values():
+            references += entry.refcount
+            text_bytes += entry.size
+            raw_bytes += entry.size * entry.refcount
+            if isinstance(entry.data, bytes):
+                compressed += 1
+                stored_bytes += len(entry.data)
+            else:
+                stored_bytes += entry.size
+        return {
+            "unique_texts": len(self._entries),
+            "references": references,
+            "compressed_texts": compressed,
+            "raw_bytes": raw_bytes,
+            "unique_bytes": text_bytes,
+            "stored_bytes": stored_bytes
+        }
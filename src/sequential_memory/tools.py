@@ -1,15 +1,18 @@
 """MCP tool definitions and handlers for sequential memory."""
 
 from typing import Dict, List, Optional, Any
-from .graph import ThoughtGraph, Node
+from .analytics import analyze_graph
+from .export import EXPORT_FORMATS, check_export_args, export_graph
+from .graph import ThoughtGraph, Node, RetentionPolicy
+from .importer import import_graph, read_records
 
 
 class SequentialMemoryTools:
     """Handles all tool operations for sequential memory."""
     
-    def __init__(self):
+    def __init__(self, retention: Optional[RetentionPolicy] = None):
         """Initialize with an empty thought graph."""
-        self.graph = ThoughtGraph()
+        self.graph = ThoughtGraph(retention=retention)
     
     def think(self, thought: str, confidence: float) -> dict:
         """
@@ -153,6 +156,121 @@ class SequentialMemoryTools:
         return {
             "unexplored": unexplored
         }
+    
+    def export_graph(self, path: str, format: str = "ndjson",
+                     root: Optional[str] = None,
+                     max_depth: Optional[int] = None) -> dict:
+        """
+        Stream the thought graph to a file.
+        
+        Args:
+            path: File to write
+            format: Export format, "ndjson" or "dot"
+            root: Only export the subtree under this node
+            max_depth: Only export this many levels below the root
+            
+        Returns:
+            Information about the written file
+        """
+        # Validate first so a bad call never truncates an existing file
+        check_export_args(self.graph, format, root, max_depth)
+        
+        with open(path, "w", encoding="utf-8") as f:
+            lines = export_graph(self.graph, f, format=format,
+                                 root=root, max_depth=max_depth)
+        
+        return {
+            "status": "success",
+            "message": f"Exported graph to {path}",
+            "path": path,
+            "format": format,
+            "lines_written": lines
+        }
+    
+    def import_graph(self, path: str, dedupe_roots: bool = False) -> dict:
+        """
+        Merge a saved or exported graph into the thought graph.
+        
+        Args:
+            path: File holding `to_dict` JSON or an NDJSON export
+            dedupe_roots: Reuse existing nodes for identical root prefixes
+            
+        Returns:
+            Information about the imported nodes
+        """
+        counter_before = self.graph.node_counter
+        with open(path, "r", encoding="utf-8") as f:
+            id_map = import_graph(self.graph, read_records(f),
+                                  dedupe_roots=dedupe_roots)
+        created = self.graph.node_counter - counter_before
+        
+        return {
+            "status": "success",
+            "message": f"Imported {len(id_map)} nodes from {path}",
+            "imported_nodes": len(id_map),
+            "created_nodes": created,
+            "reused_nodes": len(id_map) - created,
+            "current_node_id": self.graph.current_node
+        }
+    
+    def analyze_graph(self, bins: int = 10) -> dict:
+        """
+        Compute aggregate metrics over the whole thought graph.
+        
+        Args:
+            bins: Number of confidence histogram bins
+            
+        Returns:
+            Confidence, depth, branching, backtrack and alternative metrics
+        """
+        if bins < 1:
+            raise ValueError("Bins must be at least 1")
+        
+        return analyze_graph(self.graph, bins=bins)
+    
+    def dispatch(self, name: str, arguments: Dict[str, Any]) -> dict:
+        """
+        Route a tool call by name to its handler.
+        
+        Args:
+            name: The tool name
+            arguments: The tool arguments
+            
+        Returns:
+            The tool result, or an error entry for unknown tools
+        """
+        if name == "think":
+            return self.think(
+                thought=arguments["thought"],
+                confidence=arguments["confidence"]
+            )
+        elif name == "select_path":
+            return self.select_path(
+                alternatives=arguments["alternatives"],
+                selected_index=arguments["selected_index"]
+            )
+        elif name == "backtrack":
+            return self.backtrack()
+        elif name == "show_current_path":
+            return self.show_current_path()
+        elif name == "get_unexplored_branches":
+            return self.get_unexplored_branches()
+        elif name == "import_graph":
+            return self.import_graph(
+                path=arguments["path"],
+                dedupe_roots=arguments.get("dedupe_roots", False)
+            )
+        elif name == "analyze_graph":
+            return self.analyze_graph(bins=arguments.get("bins", 10))
+        elif name == "export_graph":
+            return self.export_graph(
+                path=arguments["path"],
+                format=arguments.get("format", "ndjson"),
+                root=arguments.get("root"),
+                max_depth=arguments.get("max_depth")
+            )
+        
+        return {"error": f"Unknown tool: {name}"}
 
 
 # Tool definitions for MCP
@@ -235,5 +353,68 @@ TOOL_DEFINITIONS = [
             "type": "object",  
             "properties": {}
         }
+    },
+    {
+        "name": "export_graph",
+        "description": "Stream the thought graph to a file as NDJSON or Graphviz DOT",
+        "inputSchema": {
+            "type": "object",
+            "properties": {
+                "path": {
+                    "type": "string",
+                    "description": "File to write the export to"
+                },
+                "format": {
+                    "type": "string",
+                    "description": "Export format",
+                    "enum": list(EXPORT_FORMATS),
+                    "default": "ndjson"
+                },
+                "root": {
+                    "type": "string",
+                    "description": "Only export the subtree under this node ID"
+                },
+                "max_depth": {
+                    "type": "integer",
+                    "description": "Only export this many levels below the root",
+                    "minimum": 0
+                }
+            },
+            "required": ["path"]
+        }
+    },
+    {
+        "name": "import_graph",
+        "description": "Merge a saved graph or NDJSON export into the thought graph",
+        "inputSchema": {
+            "type": "object",
+            "properties": {
+                "path": {
+                    "type": "string",
+                    "description": "File holding graph JSON or an NDJSON export"
+                },
+                "dedupe_roots": {
+                    "type": "boolean",
+                    "description": "Reuse existing nodes for identical root prefixes",
+                    "default": False
+                }
+            },
+            "required": ["path"]
+        }
+    },
+    {
+        "name": "analyze_graph",
+        "description": "Compute confidence, depth, branching and backtrack metrics for the graph",
+        "inputSchema": {
+            "type": "object",
+            "properties": {
+                "bins": {
+                    "type": "integer",
+                    "description": "Number of confidence histogram bins",
+                    "minimum": 1,
+                    "default": 10
+                }
+            }
+        }
     }
 ]
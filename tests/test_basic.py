@@ -3,12 +3,23 @@
 import unittest
 import sys
 import os
+import io
+import json
+import tempfile
+from dataclasses import asdict, replace
 
 # Add parent directory to path to import our modules
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-from src.sequential_memory.graph import ThoughtGraph, Node, Edge
+from src.sequential_memory.graph import (
+    ThoughtGraph, Node, Edge, RetentionPolicy, NODE_OVERHEAD_BYTES
+)
 from src.sequential_memory.tools import SequentialMemoryTools
+from src.sequential_memory.sharding import HashRing, ShardedDispatcher
+from src.sequential_memory.export import export_graph, iter_nodes
+from src.sequential_memory.textstore import TextStore
+from src.sequential_memory.importer import import_graph, iter_records
+from src.sequential_memory.analytics import analyze_graph, graph_to_arrays, np
 
 
 class TestThoughtGraph(unittest.TestCase):
@@ -83,6 +94,481 @@ class TestThoughtGraph(unittest.TestCase):
         self.assertEqual(selected_count, 1)
 
 
+class TestRetentionPolicy(unittest.TestCase):
+    """Test compaction of abandoned branches."""
+    
+    def build_abandoned_branch(self, graph):
+        """Explore a branch, abandon it, and continue from the root."""
+        root = graph.add_node("Root", 0.8)
+        branch = graph.add_node("Uncertain " + "z" * 200, 0.4, parent=root.id)
+        graph.create_branch_alternatives([
+            {"thought": "Taken " + "x" * 200, "confidence": 0.7},
+            {"thought": "Not taken", "confidence": 0.6}
+        ], 0)
+        graph.add_node("Deeper", 0.8, parent=graph.current_node)
+        graph.add_node("Deeper still", 0.8, parent=graph.current_node)
+        graph.set_current_node(root.id)
+        return root, branch
+    
+    def test_stub_compaction(self):
+        """Test that abandoned subtrees collapse to stubs."""
+        graph = ThoughtGraph(retention=RetentionPolicy(max_nodes=6, low_water=0.7))
+        root, branch = self.build_abandoned_branch(graph)
+        graph.add_node("New direction", 0.9, parent=root.id)
+        
+        stub = graph.nodes[branch.id]
+        self.assertEqual(stub.compacted, 3)
+        self.assertEqual(stub.thought, "Uncertain " + "z" * 200)
+        self.assertEqual(list(graph.nodes), ["node_001", "node_002", "node_004", "node_007"])
+        self.assertEqual(graph.node_counter, 7)
+        self.assertEqual(graph.get_current_path(), ["node_001", "node_007"])
+        for edge in graph.edges:
+            self.assertIn(edge.from_node, graph.nodes)
+            self.assertIn(edge.to_node, graph.nodes)
+    
+    def test_stubs_keep_unexplored_alternatives(self):
+        """Test that stubbing a branch point keeps its unexplored alternatives."""
+        graph = ThoughtGraph(retention=RetentionPolicy(max_age=60))
+        root = graph.add_node("Root", 0.8)
+        graph.add_node("Sub", 0.3, parent=root.id)
+        graph.create_branch_alternatives([
+            {"thought": "A", "confidence": 0.7},
+            {"thought": "B", "confidence": 0.6}
+        ], 0)
+        graph.set_current_node(root.id)
+        for node in graph.nodes.values():
+            node.created_at = "2000-01-01T00:00:00"
+        
+        graph.compact()
+        
+        unexplored = graph.get_unexplored_branches()
+        self.assertEqual([(b["branch_node_id"], b["unexplored_count"]) for b in unexplored],
+                         [("node_002", 1)])
+        self.assertEqual(unexplored[0]["alternatives"][0]["node_id"], "node_004")
+        self.assertNotIn("node_003", graph.nodes)
+        self.assertEqual(graph.nodes["node_002"].compacted, 1)
+    
+    def test_stub_shortens_unreported_roots(self):
+        """Test that a stub root nothing reports is shortened."""
+        graph = ThoughtGraph(retention=RetentionPolicy(max_age=60))
+        root = graph.add_node("Root", 0.8)
+        detour = graph.add_node("Detour " + "d" * 200, 0.8, parent=root.id)
+        graph.add_node("Dead end", 0.8, parent=detour.id)
+        graph.set_current_node(root.id)
+        for node in graph.nodes.values():
+            node.created_at = "2000-01-01T00:00:00"
+        
+        self.assertEqual(graph.compact(), 1)
+        
+        stub = graph.nodes[detour.id]
+        self.assertEqual(stub.thought, "Detour " + "d" * 73 + "...")
+        self.assertEqual(stub.compacted, 1)
+    
+    def test_compaction_keeps_unexplored_branches(self):
+        """Test that stubbing leaves get_unexplored_branches unchanged."""
+        graph = ThoughtGraph(retention=RetentionPolicy(max_age=60))
+        root = graph.add_node("Root", 0.8)
+        graph.add_node("Outer " + "o" * 200, 0.3, parent=root.id)
+        graph.create_branch_alternatives([
+            {"thought": "Taken " + "t" * 200, "confidence": 0.4},
+            {"thought": "Skipped " + "s" * 200, "confidence": 0.6}
+        ], 0)
+        graph.create_branch_alternatives([
+            {"thought": "Inner taken " + "i" * 200, "confidence": 0.7},
+            {"thought": "Inner skipped " + "k" * 200, "confidence": 0.6}
+        ], 0)
+        graph.add_node("Deeper", 0.8, parent=graph.current_node)
+        graph.set_current_node(root.id)
+        for node in graph.nodes.values():
+            node.created_at = "2000-01-01T00:00:00"
+        before = graph.get_unexplored_branches()
+        
+        self.assertEqual(graph.compact(), 2)
+        
+        self.assertEqual(graph.get_unexplored_branches(), before)
+    
+    def test_lone_alternatives_are_left_alone(self):
+        """Test that subtrees with nothing to collapse are not touched."""
+        graph = ThoughtGraph(retention=RetentionPolicy(max_age=60))
+        graph.add_node("Root", 0.3)
+        graph.create_branch_alternatives([
+            {"thought": "Taken", "confidence": 0.7},
+            {"thought": "Not taken " + "y" * 200, "confidence": 0.6}
+        ], 0)
+        graph.nodes["node_003"].created_at = "2000-01-01T00:00:00"
+        
+        self.assertEqual(graph.compact(), 0)
+        
+        alternative = graph.nodes["node_003"]
+        self.assertEqual(alternative.thought, "Not taken " + "y" * 200)
+        self.assertEqual(alternative.compacted, 0)
+    
+    def test_compaction_backs_off(self):
+        """Test that an unreachable budget does not compact on every insert."""
+        graph = ThoughtGraph(retention=RetentionPolicy(max_nodes=10, check_interval=50))
+        calls = []
+        compact = graph.compact
+        graph.compact = lambda: calls.append(1) or compact()
+        
+        for i in range(500):
+            graph.add_node(f"Step {i}", 0.8, parent=graph.current_node)
+        
+        self.assertEqual(len(graph.nodes), 500)
+        self.assertLessEqual(len(calls), 500 // 50 + 1)
+    
+    def test_drop_compaction(self):
+        """Test that drop mode removes abandoned subtrees outright."""
+        graph = ThoughtGraph(retention=RetentionPolicy(max_nodes=6, low_water=0.5, drop=True))
+        root, branch = self.build_abandoned_branch(graph)
+        graph.add_node("New direction", 0.9, parent=root.id)
+        
+        self.assertNotIn(branch.id, graph.nodes)
+        self.assertEqual(list(graph.nodes), ["node_001", "node_007"])
+        self.assertEqual(len(graph.edges), 1)
+        self.assertEqual(graph.get_unexplored_branches(), [])
+    
+    def test_age_compaction(self):
+        """Test that idle subtrees are compacted regardless of size."""
+        graph = ThoughtGraph(retention=RetentionPolicy(max_age=60))
+        root, branch = self.build_abandoned_branch(graph)
+        for node_id in ["node_002", "node_003", "node_004", "node_005", "node_006"]:
+            graph.nodes[node_id].created_at = "2000-01-01T00:00:00"
+        
+        graph.compact()
+        
+        self.assertEqual(graph.nodes[branch.id].compacted, 3)
+        self.assertEqual(list(graph.nodes), ["node_001", "node_002", "node_004"])
+    
+    def test_memory_plateaus(self):
+        """Test that repeated abandoned exploration stays within budget."""
+        graph = ThoughtGraph(retention=RetentionPolicy(max_nodes=50))
+        root = graph.add_node("Root", 0.9)
+        for i in range(100):
+            graph.set_current_node(root.id)
+            graph.add_node(f"Attempt {i}", 0.4, parent=root.id)
+            graph.create_branch_alternatives([
+                {"thought": "A", "confidence": 0.7},
+                {"thought": "B", "confidence": 0.6}
+            ], 0)
+            graph.add_node("Deeper", 0.8, parent=graph.current_node)
+        
+        self.assertLessEqual(len(graph.nodes), 50)
+        self.assertEqual(graph.node_counter, 401)
+        self.assertEqual(len(graph.get_current_path()), 4)
+
+
+class TestTextStore(unittest.TestCase):
+    """Test deduplicated thought text storage."""
+    
+    def setUp(self):
+        """Set up a store with a small cache."""
+        self.store = TextStore(compress_threshold=100, cache_size=2, min_size=0)
+    
+    def test_deduplication(self):
+        """Test that identical texts share one entry and handle."""
+        ref1 = self.store.put("Same thought")
+        ref2 = self.store.put("Same thought")
+        self.assertIs(ref1, ref2)
+        self.assertEqual(len(self.store), 1)
+        self.assertEqual(self.store.stats()["references"], 2)
+    
+    def test_short_texts_stay_inline(self):
+        """Test that texts below the minimum size are not stored."""
+        store = TextStore(min_size=16)
+        self.assertEqual(store.put("Short"), "Short")
+        self.assertEqual(len(store), 0)
+        
+        graph = ThoughtGraph(text_store=store)
+        node = graph.add_node("Short", 0.8)
+        self.assertEqual(node._thought, "Short")
+        self.assertEqual(node.thought, "Short")
+    
+    def test_release(self):
+        """Test that texts are freed with their last reference."""
+        ref = self.store.put("Thought")
+        self.store.put("Thought")
+        self.store.release(ref)
+        self.assertEqual(len(self.store), 1)
+        self.store.release(ref)
+        self.assertEqual(len(self.store), 0)
+    
+    def test_compression(self):
+        """Test that long texts are compressed and read back intact."""
+        text = "boilerplate " * 100
+        ref = self.store.put(text)
+        self.assertEqual(self.store.stats()["compressed_texts"], 1)
+        self.assertLess(self.store.stored_size(ref), len(text))
+        self.assertEqual(ref.resolve(), text)
+    
+    def test_lru_cache(self):
+        """Test that only the most recently read texts stay decompressed."""
+        refs = [self.store.put(f"{i} " + "x" * 200) for i in range(3)]
+        for ref in refs:
+            ref.resolve()
+        self.assertEqual(list(self.store._cache), [refs[1].key, refs[2].key])
+    
+    def test_graph_shares_texts(self):
+        """Test that graph nodes hold handles into the store."""
+        graph = ThoughtGraph(text_store=self.store)
+        root = graph.add_node("Repeated " * 50, 0.8)
+        child = graph.add_node("Repeated " * 50, 0.8, parent=root.id)
+        
+        self.assertIs(root._thought, child._thought)
+        self.assertEqual(child.thought, "Repeated " * 50)
+        self.assertEqual(child.to_dict()["thought"], "Repeated " * 50)
+        self.assertEqual(len(self.store), 1)
+    
+    def test_shared_texts_are_charged_once(self):
+        """Test that the byte budget counts a shared text only once."""
+        graph = ThoughtGraph(text_store=self.store)
+        root = graph.add_node("Repeated " * 50, 0.8)
+        first = graph._bytes
+        self.assertEqual(first, NODE_OVERHEAD_BYTES + self.store.stored_bytes)
+        
+        graph.add_node("Repeated " * 50, 0.8, parent=root.id)
+        self.assertEqual(graph._bytes, first + NODE_OVERHEAD_BYTES)
+        
+        graph._remove_nodes(list(graph.nodes))
+        self.assertEqual(graph._bytes, 0)
+        self.assertEqual(self.store.stored_bytes, 0)
+    
+    def test_node_constructor_takes_thought(self):
+        """Test that nodes are built and shown with their text, not a handle."""
+        node = Node(id="n", thought="x", confidence=0.5)
+        self.assertEqual(node.thought, "x")
+        self.assertEqual(asdict(node)["thought"], "x")
+        
+        ref = self.store.put("Stored " * 50)
+        stored = Node(id="s", thought=ref, confidence=0.5)
+        self.assertIs(stored._thought, ref)
+        self.assertIn("Stored Stored", repr(stored))
+        self.assertEqual(replace(stored, confidence=0.2).thought, "Stored " * 50)
+    
+    def test_compaction_releases_texts(self):
+        """Test that compacted nodes give up their texts."""
+        graph = ThoughtGraph(retention=RetentionPolicy(max_nodes=2, low_water=1.0, drop=True),
+                             text_store=self.store)
+        root = graph.add_node("Root", 0.8)
+        graph.add_node("Abandoned", 0.8, parent=root.id)
+        graph.set_current_node(root.id)
+        graph.add_node("Taken", 0.8, parent=root.id)
+        graph.add_node("Next", 0.8, parent=graph.current_node)
+        
+        self.assertEqual(sorted(node.thought for node in graph.nodes.values()),
+                         ["Next", "Root", "Taken"])
+        self.assertEqual(len(self.store), 3)
+
+
+class TestGraphExport(unittest.TestCase):
+    """Test streaming graph exports."""
+    
+    def setUp(self):
+        """Build a small branching graph."""
+        self.graph = ThoughtGraph()
+        root = self.graph.add_node("Root", 0.8)
+        self.graph.add_node("Branch \"point\"", 0.4, parent=root.id)
+        self.graph.create_branch_alternatives([
+            {"thought": "Option 1", "confidence": 0.7},
+            {"thought": "Option 2", "confidence": 0.6}
+        ], 0)
+        self.graph.add_node("Deeper", 0.8, parent=self.graph.current_node)
+    
+    def test_ndjson_export(self):
+        """Test that NDJSON holds a header, every node and every edge."""
+        stream = io.StringIO()
+        lines = export_graph(self.graph, stream)
+        records = [json.loads(line) for line in stream.getvalue().splitlines()]
+        
+        self.assertEqual(lines, len(records))
+        self.assertEqual(records[0]["type"], "graph")
+        self.assertEqual(records[0]["current_node"], "node_005")
+        nodes = [r for r in records if r["type"] == "node"]
+        edges = [r for r in records if r["type"] == "edge"]
+        self.assertEqual([n["id"] for n in nodes], list(self.graph.nodes))
+        self.assertEqual(len(edges), 4)
+    
+    def test_subtree_and_depth_filters(self):
+        """Test exporting part of the graph."""
+        walked = [(node.id, depth) for node, depth in iter_nodes(self.graph, root="node_002")]
+        self.assertEqual(walked, [("node_002", 0), ("node_003", 1), ("node_005", 2), ("node_004", 1)])
+        
+        stream = io.StringIO()
+        export_graph(self.graph, stream, root="node_002", max_depth=1)
+        records = [json.loads(line) for line in stream.getvalue().splitlines()]
+        nodes = [r["id"] for r in records if r["type"] == "node"]
+        edges = [(r["from"], r["to"]) for r in records if r["type"] == "edge"]
+        self.assertEqual(nodes, ["node_002", "node_003", "node_004"])
+        self.assertEqual(edges, [("node_002", "node_003"), ("node_002", "node_004")])
+    
+    def test_dot_export(self):
+        """Test Graphviz DOT output."""
+        stream = io.StringIO()
+        export_graph(self.graph, stream, format="dot")
+        dot = stream.getvalue()
+        
+        self.assertTrue(dot.startswith("digraph thoughts {"))
+        self.assertIn('"node_002" [label="Branch \\"point\\" (0.40)", shape=diamond]', dot)
+        self.assertIn('"node_002" -> "node_004" [style=dashed];', dot)
+        self.assertTrue(dot.rstrip().endswith("}"))
+    
+    def test_unknown_root(self):
+        """Test that an unknown subtree root is rejected."""
+        with self.assertRaises(ValueError):
+            export_graph(self.graph, io.StringIO(), root="node_999")
+    
+    def test_round_trip_from_dict(self):
+        """Test that a saved graph can be reloaded for export."""
+        graph = ThoughtGraph.from_dict(json.loads(json.dumps(self.graph.to_dict())))
+        self.assertEqual(graph.to_dict(), self.graph.to_dict())
+
+
+class TestGraphImport(unittest.TestCase):
+    """Test bulk import and merge of graphs."""
+    
+    def setUp(self):
+        """Build a source session to import."""
+        self.source = ThoughtGraph()
+        root = self.source.add_node("Shared start", 0.9)
+        self.source.add_node("Uncertain", 0.4, parent=root.id)
+        self.source.create_branch_alternatives([
+            {"thought": "Option 1", "confidence": 0.7},
+            {"thought": "Option 2", "confidence": 0.6}
+        ], 1)
+    
+    def test_import_into_empty_graph(self):
+        """Test seeding a new session from a saved one."""
+        graph = ThoughtGraph()
+        id_map = import_graph(graph, self.source.to_dict())
+        
+        self.assertEqual(graph.to_dict()["nodes"], self.source.to_dict()["nodes"])
+        self.assertEqual(graph.to_dict()["edges"], self.source.to_dict()["edges"])
+        self.assertEqual(graph.current_node, "node_004")
+        self.assertEqual(graph.node_counter, 4)
+        self.assertEqual(len(id_map), 4)
+    
+    def test_import_remaps_ids(self):
+        """Test that merged nodes get fresh ids and keep their structure."""
+        graph = ThoughtGraph()
+        graph.add_node("Existing", 0.8)
+        id_map = import_graph(graph, self.source.to_dict())
+        
+        self.assertEqual(id_map["node_001"], "node_002")
+        self.assertEqual(graph.node_counter, 5)
+        self.assertEqual(graph.nodes["node_003"].parent, "node_002")
+        self.assertEqual(graph.current_node, "node_001")
+        unexplored = graph.get_unexplored_branches()
+        self.assertEqual(unexplored[0]["branch_node_id"], "node_003")
+        self.assertEqual(unexplored[0]["alternatives"][0]["node_id"], "node_004")
+    
+    def test_import_ndjson_export(self):
+        """Test importing a streamed export."""
+        stream = io.StringIO()
+        export_graph(self.source, stream)
+        stream.seek(0)
+        
+        graph = ThoughtGraph()
+        import_graph(graph, stream)
+        self.assertEqual(graph.to_dict(), self.source.to_dict())
+    
+    def test_dedupe_root_prefixes(self):
+        """Test that identical root prefixes are stored once."""
+        other = ThoughtGraph()
+        root = other.add_node("Shared start", 0.9)
+        other.add_node("Uncertain", 0.4, parent=root.id)
+        other.add_node("Different idea", 0.8, parent=other.current_node)
+        
+        graph = ThoughtGraph()
+        import_graph(graph, self.source.to_dict())
+        id_map = import_graph(graph, other.to_dict(), dedupe_roots=True)
+        
+        self.assertEqual(id_map["node_001"], "node_001")
+        self.assertEqual(id_map["node_002"], "node_002")
+        self.assertEqual(id_map["node_003"], "node_005")
+        self.assertEqual(len(graph.nodes), 5)
+        self.assertEqual(len(graph.edges), 4)
+        self.assertEqual(len(graph.get_children("node_002")), 3)
+    
+    def test_records_from_dict(self):
+        """Test that to_dict output reads as export records."""
+        records = list(iter_records(self.source.to_dict()))
+        self.assertEqual([r["type"] for r in records],
+                         ["graph"] + ["node"] * 4 + ["edge"] * 3)
+
+
+@unittest.skipIf(np is None, "numpy is not installed")
+class TestGraphAnalytics(unittest.TestCase):
+    """Test vectorized graph analytics."""
+    
+    def setUp(self):
+        """Build a session with a branch and a backtrack."""
+        self.tools = SequentialMemoryTools()
+        self.tools.think("Start", 0.9)
+        self.tools.think("Uncertain", 0.4)
+        self.tools.select_path([
+            {"thought": "Option 1", "confidence": 0.7},
+            {"thought": "Option 2", "confidence": 0.6},
+            {"thought": "Option 3", "confidence": 0.5}
+        ], 0)
+        self.tools.think("Deeper", 0.8)
+        self.tools.think("Stuck", 0.3)
+        self.tools.backtrack()
+        self.tools.think("Another way", 0.8)
+    
+    def test_arrays(self):
+        """Test the columnar export."""
+        arrays = graph_to_arrays(self.tools.graph)
+        self.assertEqual(arrays.ids[0], "node_001")
+        self.assertEqual(arrays.parent.tolist(), [-1, 0, 1, 1, 1, 2, 5, 5])
+        self.assertEqual(arrays.depth.tolist(), [0, 1, 2, 2, 2, 3, 4, 4])
+        self.assertEqual(int(arrays.on_path.sum()), 5)
+    
+    def test_metrics(self):
+        """Test the aggregate metrics."""
+        result = analyze_graph(self.tools.graph, bins=5)
+        self.assertEqual(result["node_count"], 8)
+        self.assertEqual(result["root_count"], 1)
+        histogram = result["confidence"]["histogram"]
+        self.assertEqual(len(histogram["counts"]), 5)
+        self.assertEqual(sum(histogram["counts"]), 8)
+        self.assertEqual(histogram["counts"][-1], 3)
+        self.assertEqual(result["depth"]["distribution"], [1, 1, 3, 1, 2])
+        self.assertEqual(result["branching"]["max_branching_factor"], 3)
+        self.assertEqual(result["backtracks"]["count"], 1)
+        self.assertEqual(result["alternatives"]["explored"], 1)
+        self.assertEqual(result["alternatives"]["unexplored"], 2)
+        json.dumps(result)
+    
+    def test_depth_of_long_chain(self):
+        """Test depths on a deep linear graph."""
+        graph = ThoughtGraph()
+        for i in range(1000):
+            graph.add_node(f"Step {i}", 0.8, parent=graph.current_node)
+        arrays = graph_to_arrays(graph)
+        self.assertEqual(arrays.depth.tolist(), list(range(1000)))
+    
+    def test_columns_follow_compaction_and_import(self):
+        """Test that the graph's columns stay in step as it changes."""
+        graph = ThoughtGraph(retention=RetentionPolicy(max_nodes=6, drop=True, max_age=0))
+        graph.bulk_insert(iter_records(self.tools.graph.to_dict()))
+        self.assertIsNone(graph._columns)
+        graph_to_arrays(graph)
+        graph.add_node("After", 0.8, parent=graph.current_node)
+        self.assertEqual(len(graph._columns.rows), len(graph.nodes))
+        
+        arrays = graph_to_arrays(graph)
+        self.assertEqual(arrays.ids, list(graph.nodes))
+        expected = [arrays.ids.index(node.parent) if node.parent in graph.nodes else -1
+                    for node in graph.nodes.values()]
+        self.assertEqual(arrays.parent.tolist(), expected)
+        self.assertEqual(int(arrays.on_path.sum()), len(graph.get_current_path()))
+    
+    def test_empty_graph(self):
+        """Test metrics on an empty graph."""
+        result = analyze_graph(ThoughtGraph())
+        self.assertEqual(result["node_count"], 0)
+        self.assertIsNone(result["confidence"]["mean"])
+
+
 class TestSequentialMemoryTools(unittest.TestCase):
     """Test the tools implementation."""
     
@@ -179,6 +665,174 @@ class TestSequentialMemoryTools(unittest.TestCase):
         self.assertEqual(len(result["unexplored"]), 1)
         self.assertEqual(result["unexplored"][0]["unexplored_count"], 1)
 
+    def test_export_graph(self):
+        """Test exporting the graph to a file."""
+        self.tools.think("First", 0.8)
+        self.tools.think("Second", 0.7)
+        
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "graph.dot")
+            result = self.tools.export_graph(path, format="dot")
+            self.assertEqual(result["status"], "success")
+            with open(path) as f:
+                self.assertIn('"node_001" -> "node_002";', f.read())
+        
+        with self.assertRaises(ValueError):
+            self.tools.export_graph("unused", format="xml")
+    
+    def test_export_graph_invalid_root_keeps_file(self):
+        """Test that a rejected export leaves an existing file intact."""
+        self.tools.think("First", 0.8)
+        
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "graph.ndjson")
+            with open(path, "w") as f:
+                f.write("previous export\n")
+            with self.assertRaises(ValueError):
+                self.tools.export_graph(path, root="node_999")
+            with open(path) as f:
+                self.assertEqual(f.read(), "previous export\n")
+    
+    def test_import_graph(self):
+        """Test merging a saved graph from a file."""
+        source = SequentialMemoryTools()
+        source.think("First", 0.8)
+        source.think("Second", 0.7)
+        self.tools.think("First", 0.8)
+        
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "graph.json")
+            with open(path, "w") as f:
+                json.dump(source.graph.to_dict(), f, indent=2)
+            result = self.tools.import_graph(path, dedupe_roots=True)
+        
+        self.assertEqual(result["imported_nodes"], 2)
+        self.assertEqual(result["created_nodes"], 1)
+        self.assertEqual(result["reused_nodes"], 1)
+        self.assertEqual(len(self.tools.graph.nodes), 2)
+    
+    def test_dispatch(self):
+        """Test routing tool calls by name."""
+        result = self.tools.dispatch("think", {"thought": "First", "confidence": 0.8})
+        self.assertEqual(result["current_node_id"], "node_001")
+        
+        result = self.tools.dispatch("show_current_path", {})
+        self.assertEqual(result["total_nodes"], 1)
+        
+        result = self.tools.dispatch("no_such_tool", {})
+        self.assertIn("error", result)
+
+
+class TestShardedDispatcher(unittest.TestCase):
+    """Test routing sessions across worker processes."""
+    
+    def setUp(self):
+        """Start a small pool of workers."""
+        self.dispatcher = ShardedDispatcher(2)
+    
+    def tearDown(self):
+        """Stop the workers."""
+        self.dispatcher.close()
+    
+    def test_hash_ring_is_stable(self):
+        """Test that sessions map to the same worker every time."""
+        ring = HashRing(4)
+        owners = [ring.get_worker(f"session-{i}") for i in range(100)]
+        self.assertEqual(owners, [ring.get_worker(f"session-{i}") for i in range(100)])
+        self.assertEqual(set(owners), {0, 1, 2, 3})
+    
+    def test_sessions_are_isolated(self):
+        """Test that each session has its own graph."""
+        self.dispatcher.call("a", "think", {"thought": "A1", "confidence": 0.8})
+        self.dispatcher.call("a", "think", {"thought": "A2", "confidence": 0.8})
+        self.dispatcher.call("b", "think", {"thought": "B1", "confidence": 0.8})
+        
+        path_a = self.dispatcher.call("a", "show_current_path", {})
+        path_b = self.dispatcher.call("b", "show_current_path", {})
+        self.assertEqual(path_a["total_nodes"], 2)
+        self.assertEqual(path_b["total_nodes"], 1)
+    
+    def test_errors_are_returned(self):
+        """Test that tool errors come back as results."""
+        result = self.dispatcher.call("a", "think", {"thought": "Bad", "confidence": 2.0})
+        self.assertIn("error", result)
+    
+    def test_restart_recovers_state(self):
+        """Test that a restarted worker replays its sessions."""
+        self.dispatcher.call("a", "think", {"thought": "Start", "confidence": 0.8})
+        self.dispatcher.call("a", "think", {"thought": "Branch", "confidence": 0.3})
+        self.dispatcher.call("a", "select_path", {
+            "alternatives": [
+                {"thought": "Option 1", "confidence": 0.7},
+                {"thought": "Option 2", "confidence": 0.6}
+            ],
+            "selected_index": 0
+        })
+        
+        self.dispatcher.restart_worker(self.dispatcher.worker_for("a"))
+        
+        path = self.dispatcher.call("a", "show_current_path", {})
+        self.assertEqual(path["total_nodes"], 3)
+        self.assertEqual(path["path"][-1]["thought"], "Option 1")
+    
+    def test_journal_is_on_disk(self):
+        """Test that journaled calls go to the session's journal file."""
+        for i in range(5):
+            self.dispatcher.call("a", "think", {"thought": f"Step {i}", "confidence": 0.8})
+        self.dispatcher.call("a", "show_current_path", {})
+        
+        with open(self.dispatcher._journal_path("a"), encoding="utf-8") as f:
+            self.assertEqual(len(f.readlines()), 5)
+        
+        self.dispatcher.restart_worker(self.dispatcher.worker_for("a"))
+        result = self.dispatcher.call("a", "think", {"thought": "Next", "confidence": 0.8})
+        self.assertEqual(result["current_node_id"], "node_006")
+    
+    def test_diverging_replay_fails(self):
+        """Test that recovery fails loudly when replay does not match."""
+        self.dispatcher.call("a", "think", {"thought": "Start", "confidence": 0.8})
+        with open(self.dispatcher._journal_path("a"), "w", encoding="utf-8") as f:
+            f.write(json.dumps({
+                "tool": "think",
+                "arguments": {"thought": "Start", "confidence": 0.8},
+                "expected": {"current_node_id": "node_999"}
+            }) + "\n")
+        
+        with self.assertRaises(RuntimeError):
+            self.dispatcher.restart_worker(self.dispatcher.worker_for("a"))
+    
+    def test_import_replay(self):
+        """Test that imports replay, and fail loudly once the file is gone."""
+        source = ThoughtGraph()
+        start = source.add_node("Imported start", 0.8)
+        source.add_node("Imported next", 0.8, parent=start.id)
+        
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "session.json")
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(source.to_dict(), f)
+            self.dispatcher.call("a", "import_graph", {"path": path})
+            self.dispatcher.call("a", "think", {"thought": "Continue", "confidence": 0.8})
+            self.dispatcher.restart_worker(self.dispatcher.worker_for("a"))
+            
+            result = self.dispatcher.call("a", "show_current_path", {})
+            self.assertEqual([node["thought"] for node in result["path"]],
+                             ["Imported start", "Imported next", "Continue"])
+        
+        with self.assertRaises(RuntimeError):
+            self.dispatcher.restart_worker(self.dispatcher.worker_for("a"))
+    
+    def test_dead_worker_is_restarted(self):
+        """Test that a crashed worker is replaced on the next call."""
+        self.dispatcher.call("a", "think", {"thought": "Start", "confidence": 0.8})
+        
+        worker = self.dispatcher._workers[self.dispatcher.worker_for("a")]
+        worker.process.kill()
+        worker.process.join()
+        
+        result = self.dispatcher.call("a", "think", {"thought": "Next", "confidence": 0.8})
+        self.assertEqual(result["current_node_id"], "node_002")
+
 
 class TestEndToEndScenarios(unittest.TestCase):
     """Test complete usage scenarios."""